@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+经验文件索引 - 基于 frontmatter 与标题的增量本地索引
+
+解析知识库中 Exp_*.md 的 frontmatter（id、tags、industry、platform、published_date）
+和标题，存入知识库目录下的 SQLite 文件。重建时按 mtime/大小判断变化，
+内容哈希未变的文件不会重新解析，数万个文件也能快速更新。
+
+支持按标签、行业、平台、发布日期范围查询，以及按标签重合度查找关联文件
+（用于「关联已学知识」）。
+"""
+
+import json
+import re
+import sqlite3
+import sys
+import time
+import hashlib
+from pathlib import Path
+from typing import Optional
+
+INDEX_FILE = ".exp_index.sqlite"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime REAL NOT NULL,
+    size INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    id TEXT,
+    title TEXT,
+    industry TEXT,
+    platform TEXT,
+    published_date TEXT,
+    source_file TEXT,
+    tag_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS tags (
+    path TEXT NOT NULL,
+    tag TEXT NOT NULL COLLATE NOCASE,
+    PRIMARY KEY (tag, path)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS headings (
+    path TEXT NOT NULL,
+    level INTEGER NOT NULL,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tags_path ON tags(path);
+CREATE INDEX IF NOT EXISTS idx_headings_path ON headings(path);
+CREATE INDEX IF NOT EXISTS idx_files_industry ON files(industry COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_files_platform ON files(platform COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_files_date ON files(published_date);
+CREATE INDEX IF NOT EXISTS idx_files_id ON files(id);
+"""
+
+
+def _unquote(value: str) -> str:
+    value = value.strip()
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def normalize_date(value: str) -> Optional[str]:
+    """把 2024-1-5、2024/01/05、2024年1月5日 等写法统一为 YYYY-MM-DD"""
+    match = re.search(r"(\d{4})\s*[-/.年]\s*(\d{1,2})(?:\s*[-/.月]\s*(\d{1,2}))?", value or "")
+    if not match:
+        return None
+    year, month, day = match.group(1), int(match.group(2)), int(match.group(3) or 1)
+    return f"{year}-{month:02d}-{day:02d}"
+
+
+def parse_experience_file(text: str) -> dict:
+    """解析经验文件的 frontmatter 与标题"""
+    meta: dict = {}
+    body = text
+    if text.startswith("---"):
+        end = text.find("\n---", 3)
+        if end != -1:
+            body = text[end + 4:]
+            current_list = None
+            for line in text[3:end].splitlines():
+                if current_list is not None and line.lstrip().startswith("- "):
+                    meta[current_list].append(_unquote(line.lstrip()[2:]))
+                    continue
+                current_list = None
+                key, sep, value = line.partition(":")
+                if not sep or not key.strip() or key.startswith(" "):
+                    continue
+                key, value = key.strip(), value.strip()
+                if value.startswith("[") and value.endswith("]"):
+                    meta[key] = [_unquote(v) for v in value[1:-1].split(",") if v.strip()]
+                elif not value:
+                    meta[key] = []
+                    current_list = key
+                else:
+                    meta[key] = _unquote(value)
+
+    tags = meta.get("tags") or []
+    if isinstance(tags, str):
+        tags = [t for t in re.split(r"[,，]", tags) if t.strip()]
+
+    headings = []
+    title = None
+    for match in re.finditer(r"^(#{1,6})\s+(.+?)\s*$", body, re.MULTILINE):
+        level, heading = len(match.group(1)), match.group(2)
+        if level == 1 and title is None:
+            title = re.sub(r"^📚\s*", "", heading)
+        headings.append((level, heading))
+
+    def scalar(key):
+        value = meta.get(key)
+        return value if isinstance(value, str) and value else None
+
+    return {
+        "id": scalar("id"),
+        "title": title,
+        "industry": scalar("industry"),
+        "platform": scalar("platform"),
+        "published_date": normalize_date(scalar("published_date") or "") or scalar("published_date"),
+        "source_file": scalar("source_file"),
+        "tags": list(dict.fromkeys(t.strip() for t in tags if t.strip())),
+        "headings": headings,
+    }
+
+
+class ExperienceIndex:
+    def __init__(self, kb_dir: str, db_path: Optional[str] = None):
+        self.kb_dir = Path(kb_dir)
+        self.db_path = Path(db_path) if db_path else self.kb_dir / INDEX_FILE
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _scan(self) -> dict:
+        files = {}
+        for path in self.kb_dir.rglob("Exp_*.md"):
+            rel = path.relative_to(self.kb_dir)
+            if rel.parts[0] == "_source":
+                continue
+            files[rel.as_posix()] = path
+        return files
+
+    def update(self) -> dict:
+        """增量更新索引：mtime/大小未变跳过，内容哈希未变只刷新 mtime"""
+        start = time.time()
+        stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        known = {
+            row["path"]: (row["mtime"], row["size"], row["hash"])
+            for row in self.conn.execute("SELECT path, mtime, size, hash FROM files")
+        }
+        on_disk = self._scan()
+
+        with self.conn:
+            removed = [(p,) for p in known if p not in on_disk]
+            self._delete(removed)
+            stats["removed"] = len(removed)
+
+            for rel, path in on_disk.items():
+                st = path.stat()
+                previous = known.get(rel)
+                if previous and previous[0] == st.st_mtime and previous[1] == st.st_size:
+                    stats["unchanged"] += 1
+                    continue
+
+                data = path.read_bytes()
+                digest = hashlib.sha256(data).hexdigest()
+                if previous and previous[2] == digest:
+                    self.conn.execute("UPDATE files SET mtime = ?, size = ? WHERE path = ?",
+                                      (st.st_mtime, st.st_size, rel))
+                    stats["unchanged"] += 1
+                    continue
+
+                info = parse_experience_file(data.decode("utf-8", errors="replace"))
+                self._delete([(rel,)])
+                self.conn.execute(
+                    "INSERT INTO files (path, mtime, size, hash, id, title, industry, platform,"
+                    " published_date, source_file, tag_count) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (rel, st.st_mtime, st.st_size, digest, info["id"], info["title"], info["industry"],
+                     info["platform"], info["published_date"], info["source_file"], len(info["tags"])),
+                )
+                self.conn.executemany("INSERT OR IGNORE INTO tags (path, tag) VALUES (?, ?)",
+                                      [(rel, tag) for tag in info["tags"]])
+                self.conn.executemany("INSERT INTO headings (path, level, text) VALUES (?, ?, ?)",
+                                      [(rel, level, text) for level, text in info["headings"]])
+                stats["updated" if previous else "added"] += 1
+
+        stats["elapsed"] = round(time.time() - start, 3)
+        return stats
+
+    def _delete(self, paths: list):
+        for table in ("files", "tags", "headings"):
+            self.conn.executemany(f"DELETE FROM {table} WHERE path = ?", paths)
+
+    def _rows(self, sql: str, params: list, limit: int) -> list[dict]:
+        sql += f" ORDER BY f.published_date DESC, f.path LIMIT {int(limit)}"
+        results = []
+        for row in self.conn.execute(sql, params).fetchall():
+            item = dict(row)
+            item["tags"] = [r["tag"] for r in self.conn.execute(
+                "SELECT tag FROM tags WHERE path = ?", (item["path"],))]
+            results.append(item)
+        return results
+
+    def query(
+        self,
+        tags: Optional[list] = None,
+        industry: Optional[str] = None,
+        platform: Optional[str] = None,
+        since: Optional[str] = None,
+        until: Optional[str] = None,
+        heading: Optional[str] = None,
+        limit: int = 50,
+    ) -> list[dict]:
+        """按标签（全部命中）、行业、平台、发布日期范围和标题关键词查询"""
+        sql = ("SELECT f.path, f.id, f.title, f.industry, f.platform, f.published_date, f.source_file"
+               " FROM files f WHERE 1 = 1")
+        params: list = []
+        for tag in tags or []:
+            sql += " AND EXISTS (SELECT 1 FROM tags t WHERE t.tag = ? AND t.path = f.path)"
+            params.append(tag)
+        if industry:
+            sql += " AND f.industry = ? COLLATE NOCASE"
+            params.append(industry)
+        if platform:
+            sql += " AND f.platform = ? COLLATE NOCASE"
+            params.append(platform)
+        if since:
+            sql += " AND f.published_date >= ?"
+            params.append(normalize_date(since) or since)
+        if until:
+            sql += " AND f.published_date <= ?"
+            params.append(normalize_date(until) or until)
+        if heading:
+            sql += " AND EXISTS (SELECT 1 FROM headings h WHERE h.path = f.path AND h.text LIKE ?)"
+            params.append(f"%{heading}%")
+        return self._rows(sql, params, limit)
+
+    def _resolve(self, target: str) -> Optional[sqlite3.Row]:
+        """依次按精确路径、id 查找目标文件；按文件名后缀匹配时仅在唯一命中时采用"""
+        path = Path(target)
+        if path.is_absolute() or path.exists():
+            try:
+                target = path.resolve().relative_to(self.kb_dir.resolve()).as_posix()
+            except ValueError:
+                pass
+        for sql, param in (
+            ("SELECT path, tag_count FROM files WHERE path = ?", Path(target).as_posix()),
+            ("SELECT path, tag_count FROM files WHERE id = ?", target),
+        ):
+            row = self.conn.execute(sql, (param,)).fetchone()
+            if row is not None:
+                return row
+
+        name = Path(target).name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        rows = self.conn.execute(
+            "SELECT path, tag_count FROM files WHERE path = ? OR path LIKE ? ESCAPE '\\' LIMIT 2",
+            (Path(target).name, f"%/{name}"),
+        ).fetchall()
+        return rows[0] if len(rows) == 1 else None
+
+    def related(self, target: str, limit: int = 10) -> list[dict]:
+        """按标签重合度（Jaccard）查找与目标文件相关的经验文件，target 可以是路径或 id"""
+        row = self._resolve(target)
+        if row is None:
+            return []
+
+        sql = """
+            SELECT f.path, f.id, f.title, f.industry, f.platform, f.published_date, f.source_file,
+                   COUNT(*) AS overlap,
+                   ROUND(CAST(COUNT(*) AS REAL) / (? + f.tag_count - COUNT(*)), 3) AS score
+            FROM tags t1
+            JOIN tags t2 ON t2.tag = t1.tag AND t2.path != t1.path
+            JOIN files f ON f.path = t2.path
+            WHERE t1.path = ?
+            GROUP BY f.path
+            ORDER BY score DESC, overlap DESC, f.published_date DESC
+            LIMIT ?
+        """
+        results = []
+        for r in self.conn.execute(sql, (row["tag_count"], row["path"], limit)).fetchall():
+            item = dict(r)
+            item["shared_tags"] = [t["tag"] for t in self.conn.execute(
+                "SELECT t2.tag FROM tags t1 JOIN tags t2 ON t2.tag = t1.tag"
+                " WHERE t1.path = ? AND t2.path = ?", (row["path"], item["path"]))]
+            results.append(item)
+        return results
+
+
+def _print_results(results: list[dict], as_json: bool):
+    if as_json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return
+    for r in results:
+        extra = f"  [重合 {r['overlap']}, {r['score']}]" if "score" in r else ""
+        tags = ", ".join(r.get("shared_tags") or r.get("tags") or [])
+        print(f"{r['path']}  {r['published_date'] or '-'}  {r['industry'] or '-'}  {r['title'] or ''}{extra}")
+        if tags:
+            print(f"    tags: {tags}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="经验文件索引 - 按标签/行业/日期快速查询与关联",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 增量建立/更新索引
+  %(prog)s build experience_repo
+
+  # 按标签、行业、日期范围查询
+  %(prog)s query experience_repo --tag 知识管理 --industry 互联网 --since 2024-01-01
+
+  # 查找与某个经验文件标签重合度最高的文件（用于「关联已学知识」）
+  %(prog)s related experience_repo Exp_xxx.md
+        """
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="增量建立/更新索引")
+    build.add_argument("kb_dir", help="知识库目录")
+    build.add_argument("--db", default=None, help=f"索引文件路径 (默认：<知识库>/{INDEX_FILE})")
+
+    query = sub.add_parser("query", help="按 frontmatter 条件查询")
+    query.add_argument("kb_dir", help="知识库目录")
+    query.add_argument("--tag", action="append", help="标签，可重复（需全部命中）")
+    query.add_argument("--industry", help="行业")
+    query.add_argument("--platform", help="平台")
+    query.add_argument("--since", help="发布日期起 (YYYY-MM-DD)")
+    query.add_argument("--until", help="发布日期止 (YYYY-MM-DD)")
+    query.add_argument("--heading", help="标题包含的关键词")
+
+    related = sub.add_parser("related", help="按标签重合度查找关联文件")
+    related.add_argument("kb_dir", help="知识库目录")
+    related.add_argument("target", help="经验文件路径、文件名或 id")
+
+    for p in (query, related):
+        p.add_argument("--db", default=None, help=f"索引文件路径 (默认：<知识库>/{INDEX_FILE})")
+        p.add_argument("--limit", type=int, default=20, help="返回数量 (默认：20)")
+        p.add_argument("--refresh", action="store_true", help="查询前先增量更新索引")
+        p.add_argument("--json", action="store_true", help="输出 JSON 格式")
+
+    args = parser.parse_args()
+
+    if not Path(args.kb_dir).is_dir():
+        print(json.dumps({"error": f"路径不存在：{args.kb_dir}"}, ensure_ascii=False), file=sys.stderr)
+        sys.exit(1)
+
+    index = ExperienceIndex(args.kb_dir, args.db)
+    try:
+        if args.command == "build":
+            print(json.dumps(index.update(), ensure_ascii=False))
+            return
+
+        if args.refresh:
+            index.update()
+        start = time.perf_counter()
+        if args.command == "query":
+            results = index.query(args.tag, args.industry, args.platform, args.since, args.until,
+                                  args.heading, args.limit)
+        else:
+            results = index.related(args.target, args.limit)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        _print_results(results, args.json)
+        if not args.json:
+            print(f"\n{len(results)} 条结果，{elapsed_ms:.1f} ms", file=sys.stderr)
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
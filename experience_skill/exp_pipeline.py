@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+经验文件流水线 - 截图文件夹一次性转为经验知识库
+
+OCR 与 LLM 生成通过有界队列串联，两个阶段并行重叠：
+    图片扫描 → [OCR 队列] → OCR 线程 → 写入 _source 原文备份
+             → [生成队列] → 生成线程 → 按 skill.md 模板写入 Exp_ 经验文件
+
+按图片内容哈希记录进度，中断后重新运行会跳过已完成的图片。
+"""
+
+import json
+import os
+import queue
+import re
+import sys
+import threading
+import time
+import hashlib
+from datetime import date
+from pathlib import Path
+from typing import Optional
+
+SKILL_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(SKILL_DIR.parent / "ocr-batch"))
+
+from ocr_batch import OCRProcessor, preferred_ollama_host  # noqa: E402
+from exp_index import ExperienceIndex  # noqa: E402
+
+try:
+    from litellm import completion
+except ImportError:
+    print(json.dumps({"error": "请安装 litellm: pip install litellm"}), file=sys.stderr)
+    sys.exit(1)
+
+
+STATE_FILE = ".pipeline_state.json"
+DEFAULT_LLM_MODEL = "openrouter/deepseek/deepseek-chat"
+
+_DONE = object()
+
+
+def load_experience_template(skill_file: Path = SKILL_DIR / "skill.md") -> str:
+    """读取 skill.md 中的角色设定与经验文件模板（不含原文备份模板）"""
+    text = skill_file.read_text(encoding="utf-8")
+    end = text.find("\n---\nsource_type:")
+    return text[:end] if end != -1 else text
+
+
+def render_source_backup(title: str, text: str, image: Path, exp_name: str) -> str:
+    """按 skill.md 的「原文备份模板」渲染 _source 文件"""
+    today = date.today().isoformat()
+    return f"""---
+source_type: image
+original_title: "{title}"
+backup_date: "{today}"
+---
+
+# 🗄️ 原文备份：{title}
+
+> ⚠️ 此文件为原文内容备份，用于深度参考。
+> 📎 经验文件：`{exp_name}`
+
+## 📋 原文内容
+{text.strip()}
+
+## 🖼️ 截图/附件索引
+- [截图 1]: OCR 原图 → {image}
+"""
+
+
+def extract_source_text(source_md: str) -> str:
+    """从原文备份中取回原文内容（用于断点续跑）"""
+    match = re.search(r"## 📋 原文内容\n(.*?)\n## 🖼️", source_md, re.DOTALL)
+    return match.group(1).strip() if match else source_md
+
+
+def file_hash(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ExperiencePipeline:
+    def __init__(
+        self,
+        processor: OCRProcessor,
+        output_dir: str = "experience_repo",
+        llm_model: str = DEFAULT_LLM_MODEL,
+        ocr_workers: int = 1,
+        gen_workers: int = 4,
+        queue_size: int = 8,
+        max_tokens: int = 4000,
+    ):
+        if ocr_workers < 1 or gen_workers < 1:
+            raise ValueError("ocr_workers 与 gen_workers 至少为 1")
+        self.processor = processor
+        self.output_dir = Path(output_dir)
+        self.source_dir = self.output_dir / "_source"
+        self.llm_model = llm_model
+        self.ocr_workers = ocr_workers
+        self.gen_workers = gen_workers
+        self.queue_size = queue_size
+        self.max_tokens = max_tokens
+        self.template = load_experience_template()
+        self.state_path = self.output_dir / STATE_FILE
+        self.state = self._load_state()
+        self._lock = threading.Lock()
+        self.stats = {"success": 0, "failed": 0, "skipped": 0}
+
+    def _load_state(self) -> dict:
+        if self.state_path.exists():
+            try:
+                return json.loads(self.state_path.read_text(encoding="utf-8"))
+            except ValueError:
+                pass
+        return {}
+
+    def _update_state(self, digest: str, **fields):
+        """更新进度记录，先写临时文件再替换，避免中断时损坏"""
+        with self._lock:
+            self.state.setdefault(digest, {}).update(fields)
+            tmp = self.state_path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.state, ensure_ascii=False, indent=2), encoding="utf-8")
+            os.replace(tmp, self.state_path)
+
+    def _count(self, key: str, item: Optional[dict] = None, error: Optional[Exception] = None):
+        with self._lock:
+            self.stats[key] += 1
+        if error is not None:
+            print(json.dumps({"error": str(error), "source": str(item["image"])}, ensure_ascii=False), file=sys.stderr)
+
+    def _names(self, item: dict) -> tuple[str, str]:
+        return f"{item['name']}.source.md", f"Exp_{item['name']}.md"
+
+    def _ocr_stage(self, ocr_queue: queue.Queue, gen_queue: queue.Queue):
+        while True:
+            item = ocr_queue.get()
+            if item is _DONE:
+                break
+            try:
+                text = self.processor.recognize(item["image"])
+                if not text:
+                    raise ValueError("OCR 返回空结果")
+                source_name, exp_name = self._names(item)
+                backup = render_source_backup(item["name"], text, item["image"], exp_name)
+                (self.source_dir / source_name).write_text(backup, encoding="utf-8")
+                self._update_state(item["hash"], image=str(item["image"]), source_file=f"_source/{source_name}", status="ocr")
+                item["text"] = text
+                gen_queue.put(item)
+            except Exception as e:
+                self._count("failed", item, e)
+
+    def _generate(self, item: dict) -> str:
+        source_name, _ = self._names(item)
+        today = date.today().isoformat()
+        response = completion(
+            model=self.llm_model,
+            messages=[
+                {"role": "system", "content": self.template},
+                {"role": "user", "content": (
+                    f"文章来源：截图 {item['image'].name}（OCR 识别结果如下）\n"
+                    f"id: {item['hash'][:12]}\n"
+                    f"source_file: \"_source/{source_name}\"\n"
+                    f"processed_date: \"{today}\"\n"
+                    "只输出经验文件的 Markdown 内容，不要输出原文备份。\n\n"
+                    f"{item['text']}"
+                )},
+            ],
+            max_tokens=self.max_tokens,
+            temperature=0.3,
+        )
+        content = response.choices[0].message.content.strip()
+        # 去掉模型可能包裹的代码块，并确保 id 为内容哈希、source_file 指向原文备份
+        content = re.sub(r"^```(?:markdown|md)?\n(.*)\n```$", r"\1", content, flags=re.DOTALL)
+        content = re.sub(r'^id:.*$', f'id: {item["hash"][:12]}', content, count=1, flags=re.MULTILINE)
+        content = re.sub(r'^source_file:.*$', f'source_file: "_source/{source_name}"', content, count=1, flags=re.MULTILINE)
+        return content + "\n"
+
+    def _gen_stage(self, gen_queue: queue.Queue):
+        while True:
+            item = gen_queue.get()
+            if item is _DONE:
+                break
+            try:
+                _, exp_name = self._names(item)
+                (self.output_dir / exp_name).write_text(self._generate(item), encoding="utf-8")
+                self._update_state(item["hash"], exp_file=exp_name, status="done")
+                self._count("success")
+                print(json.dumps({"source": str(item["image"]), "exp_file": str(self.output_dir / exp_name)}, ensure_ascii=False))
+            except Exception as e:
+                self._count("failed", item, e)
+
+    def run(self, source: str) -> dict:
+        source_path = Path(source)
+        if not source_path.exists():
+            print(json.dumps({"error": f"路径不存在：{source}"}), file=sys.stderr)
+            return self.stats
+
+        images = self.processor.find_images(source_path)
+        if not images:
+            print(json.dumps({"error": f"未找到图片文件：{source}"}), file=sys.stderr)
+            return self.stats
+
+        self.source_dir.mkdir(parents=True, exist_ok=True)
+        start = time.time()
+
+        ocr_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        gen_queue: queue.Queue = queue.Queue(maxsize=self.queue_size)
+        ocr_threads = [threading.Thread(target=self._ocr_stage, args=(ocr_queue, gen_queue), daemon=True)
+                       for _ in range(self.ocr_workers)]
+        gen_threads = [threading.Thread(target=self._gen_stage, args=(gen_queue,), daemon=True)
+                       for _ in range(self.gen_workers)]
+        for t in ocr_threads + gen_threads:
+            t.start()
+
+        # 进度按内容哈希记录，内容相同的图片只处理第一张
+        items, seen = [], {}
+        for image in images:
+            digest = file_hash(image)
+            if digest in seen:
+                print(json.dumps({"warning": f"与 {seen[digest]} 内容相同，已跳过", "source": str(image)},
+                                 ensure_ascii=False), file=sys.stderr)
+                self._count("skipped")
+                continue
+            seen[digest] = image
+            items.append({"image": image, "hash": digest})
+
+        # 同名不同扩展名（如 s1.png 与 s1.jpg）时带上扩展名，避免输出文件互相覆盖
+        stems = [item["image"].stem for item in items]
+        for item in items:
+            image = item["image"]
+            item["name"] = image.stem if stems.count(image.stem) == 1 else f"{image.stem}_{image.suffix.lstrip('.')}"
+            record = self.state.get(item["hash"], {})
+            if record.get("status") == "done" and (self.output_dir / record.get("exp_file", "")).is_file():
+                self._count("skipped")
+                continue
+            source_file = self.output_dir / record.get("source_file", "_missing_")
+            if record.get("status") == "ocr" and source_file.is_file():
+                # OCR 已完成，直接进入生成阶段
+                item["text"] = extract_source_text(source_file.read_text(encoding="utf-8"))
+                gen_queue.put(item)
+            else:
+                ocr_queue.put(item)
+
+        for _ in ocr_threads:
+            ocr_queue.put(_DONE)
+        for t in ocr_threads:
+            t.join()
+        for _ in gen_threads:
+            gen_queue.put(_DONE)
+        for t in gen_threads:
+            t.join()
+
+        self.stats["elapsed"] = round(time.time() - start, 2)
+        return self.stats
+
+
+def main():
+    import argparse
+
+    def positive_int(value):
+        number = int(value)
+        if number < 1:
+            raise argparse.ArgumentTypeError("必须大于等于 1")
+        return number
+
+    parser = argparse.ArgumentParser(
+        description="经验文件流水线 - 截图 OCR 与经验文件生成并行处理",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 截图文件夹 → experience_repo/
+  %(prog)s ./screenshots/
+
+  # 指定输出目录与生成模型
+  %(prog)s ./screenshots/ -o ./kb --llm-model openrouter/qwen/qwen3-235b-a22b
+
+  # 调整并发：OCR 2 路、生成 8 路
+  %(prog)s ./screenshots/ --ocr-workers 2 --gen-workers 8
+
+  # 中断后重新运行即可续跑（按图片内容哈希跳过已完成项）
+  %(prog)s ./screenshots/
+        """
+    )
+
+    parser.add_argument("source", help="图片文件或目录路径")
+    parser.add_argument("-o", "--output-dir", default="experience_repo", help="知识库目录 (默认：experience_repo)")
+    parser.add_argument("-m", "--model", default="ministral-3-4k:latest", help="OCR 模型 (默认：ministral-3-4k:latest)")
+    parser.add_argument("--llm-model", default=os.environ.get("EXP_LLM_MODEL", DEFAULT_LLM_MODEL),
+                        help=f"生成经验文件的 LiteLLM 模型 (默认：$EXP_LLM_MODEL 或 {DEFAULT_LLM_MODEL})")
+    parser.add_argument("--ocr-workers", type=positive_int, default=1, help="OCR 并发数 (默认：1)")
+    parser.add_argument("--gen-workers", type=positive_int, default=4, help="生成并发数 (默认：4)")
+    parser.add_argument("--queue-size", type=positive_int, default=8, help="阶段间队列容量 (默认：8)")
+    parser.add_argument("--max-tokens", type=int, default=4000, help="生成最大 tokens (默认：4000)")
+    parser.add_argument("-t", "--timeout", type=float, default=60.0, help="OCR 超时时间 (秒) (默认：60)")
+    parser.add_argument("--api-url", default=None, help="OCR API 地址，默认使用端点档案中最快的地址")
+    parser.add_argument("--api-key", default=None, help="OCR API Key (Bearer Token)")
+
+    args = parser.parse_args()
+
+    processor = OCRProcessor(
+        model=args.model,
+        timeout=args.timeout,
+        api_url=args.api_url or preferred_ollama_host(args.model),
+        api_key=args.api_key,
+    )
+    pipeline = ExperiencePipeline(
+        processor,
+        output_dir=args.output_dir,
+        llm_model=args.llm_model,
+        ocr_workers=args.ocr_workers,
+        gen_workers=args.gen_workers,
+        queue_size=args.queue_size,
+        max_tokens=args.max_tokens,
+    )
+
+    stats = pipeline.run(args.source)
+    if stats["success"]:
+        # 新生成的经验文件立即进入 frontmatter 索引
+        index = ExperienceIndex(args.output_dir)
+        try:
+            stats["index"] = index.update()
+        finally:
+            index.close()
+    print(json.dumps({"stats": stats}, ensure_ascii=False))
+    sys.exit(1 if stats["failed"] else 0)
+
+
+if __name__ == "__main__":
+    main()
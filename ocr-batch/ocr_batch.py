@@ -21,6 +21,26 @@ except ImportError:
     sys.exit(1)
 
 
+def preferred_ollama_host(model: Optional[str] = None) -> Optional[str]:
+    """读取 setup_env.py --doctor 生成的端点档案，返回最快的可用 ollama 地址（指定 model 时只选探测过该模型的地址）"""
+    profile = os.environ.get(
+        "SKILLS_ENDPOINT_PROFILE",
+        os.path.join(os.path.expanduser("~"), ".cache", "my_skills", "endpoint_profile.json")
+    )
+    try:
+        with open(profile, "r") as f:
+            ranked = json.load(f)["endpoints"]["ollama"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    # ollama 中 "name" 与 "name:latest" 是同一个模型
+    if model and ":" not in model:
+        model += ":latest"
+    for endpoint in ranked:
+        if endpoint.get("ok") and (not model or endpoint.get("model") == model):
+            return endpoint["url"]
+    return None
+
+
 class OCRProcessor:
     def __init__(
         self,
@@ -112,6 +132,14 @@ class OCRProcessor:
 
         return None
 
+    def find_images(self, source: Path) -> list[Path]:
+        """返回 source 中的图片文件（source 为单个图片时返回它本身）"""
+        return self._get_image_files(source)
+
+    def recognize(self, image_path: Path) -> Optional[str]:
+        """识别单张图片，失败重试后仍出错时抛出异常"""
+        return self._ocr_single(image_path)
+
     def process_single(self, image_path: Path, output_format: str = "text") -> bool:
         try:
             result = self._ocr_single(image_path)
@@ -216,7 +244,7 @@ def main():
     parser.add_argument("-m", "--model", default=None, help="OCR 模型 (默认：ministral-3-4k:latest)")
     parser.add_argument("--json", action="store_true", help="输出 JSON 格式")
     parser.add_argument("-t", "--timeout", type=float, default=30.0, help="超时时间 (秒) (默认：30)")
-    parser.add_argument("--api-url", default=None, help="自定义 API 地址 (如：http://localhost:11434)")
+    parser.add_argument("--api-url", default=None, help="自定义 API 地址 (如：http://localhost:11434)，默认使用端点档案中最快的地址")
     parser.add_argument("--api-key", default=None, help="自定义 API Key (Bearer Token)")
 
     args = parser.parse_args()
@@ -227,7 +255,7 @@ def main():
     processor = OCRProcessor(
         model=model,
         timeout=args.timeout,
-        api_url=args.api_url,
+        api_url=args.api_url or preferred_ollama_host(model),
         api_key=args.api_key,
     )
 
@@ -18,9 +18,74 @@ License: MIT
 
 import os
 import sys
+import re
 import json
+import time
 import argparse
-from typing import Optional, Dict, Any, List
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from typing import Optional, Dict, Any, List, Tuple
+
+
+# Approximate OpenRouter pricing in USD: (input per 1M tokens, output per 1M
+# tokens, request fee per 1000 requests). Used only for spend estimates.
+MODEL_PRICING = {
+    "sonar": (1.0, 1.0, 5.0),
+    "sonar-pro": (3.0, 15.0, 6.0),
+    "sonar-reasoning": (1.0, 5.0, 5.0),
+    "sonar-reasoning-pro": (2.0, 8.0, 6.0),
+    "sonar-pro-search": (3.0, 15.0, 18.0),
+}
+
+# Prior expectations for --model auto when the ledger has too little history:
+# (typical latency in seconds, typical completion tokens).
+ROUTE_PRIORS = {
+    "sonar": (3.0, 300),
+    "sonar-pro": (6.0, 700),
+    "sonar-reasoning-pro": (15.0, 1000),
+    "sonar-pro-search": (30.0, 1800),
+}
+
+# Order in which --model auto downgrades when a budget cannot be met.
+ROUTE_DOWNGRADE = ["sonar-pro-search", "sonar-reasoning-pro", "sonar-pro", "sonar"]
+
+# --model auto only reads this many recent ledger records, so routing stays
+# fast however large the ledger grows.
+ROUTE_LEDGER_TAIL = 2000
+
+DEEP_KEYWORDS = (
+    "compare", "comparison", "versus", "vs", "comprehensive", "literature review",
+    "systematic review", "survey", "state of the art", "landscape", "meta-analysis",
+    "对比", "比较", "综述", "全面", "调研",
+)
+
+REASONING_KEYWORDS = (
+    "why", "explain how", "step by step", "step-by-step", "derive", "prove", "calculate",
+    "design", "trade-off", "tradeoff", "reason through", "walk through", "analyze", "analyse",
+    "为什么", "推导", "证明", "计算", "步骤", "设计", "分析",
+)
+
+LOOKUP_PREFIXES = (
+    "what is", "what are", "who", "when", "where", "define", "list", "how many", "how much",
+    "是什么", "什么是", "谁", "哪",
+)
+
+# Clauses that tell the model how to answer rather than what to search for.
+# --deep keeps them on every sub-query instead of searching them on their own.
+INSTRUCTION_PREFIXES = (
+    "answer", "respond", "reply", "be", "keep", "please", "format", "cite", "in english", "in chinese",
+    "请", "用中文", "用英文", "简洁", "简要", "回答",
+)
+
+# Cheap model used by --deep to split questions that have no visible structure.
+PLANNER_MODEL = "openrouter/perplexity/sonar"
+
+# Query parameters dropped when normalizing citations: exact names, plus any utm_* parameter.
+TRACKING_PARAMS = {"fbclid", "gclid", "ref", "ref_src"}
+
+_ledger_lock = threading.Lock()
 
 
 def check_dependencies():
@@ -49,12 +114,141 @@ def check_api_key() -> Optional[str]:
     return api_key
 
 
+def default_ledger_path() -> str:
+    """Return the usage ledger path (PERPLEXITY_LEDGER or ~/.cache default)."""
+    return os.environ.get(
+        "PERPLEXITY_LEDGER",
+        os.path.join(os.path.expanduser("~"), ".cache", "perplexity-search", "ledger.jsonl")
+    )
+
+
+def append_to_ledger(entry: Dict[str, Any], ledger_path: Optional[str] = None) -> bool:
+    """
+    Append one call record to the JSONL usage ledger.
+
+    Args:
+        entry: Record to append (model, latency, tokens, status, cache)
+        ledger_path: Ledger file (default: default_ledger_path())
+
+    Returns:
+        True if the record was written, False otherwise
+    """
+    path = ledger_path or default_ledger_path()
+    try:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        line = json.dumps(entry, ensure_ascii=False) + "\n"
+        with _ledger_lock:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(line)
+        return True
+    except OSError as e:
+        print(f"Warning: could not write usage ledger {path}: {e}", file=sys.stderr)
+        return False
+
+
+def read_ledger(ledger_path: Optional[str] = None, tail: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Read records from the usage ledger, skipping malformed lines.
+
+    Args:
+        ledger_path: Ledger file (default: default_ledger_path())
+        tail: Only read the last `tail` lines, seeking from the end of the file
+
+    Returns:
+        List of ledger records, oldest first
+    """
+    path = ledger_path or default_ledger_path()
+    if not os.path.exists(path):
+        return []
+
+    with open(path, "rb") as f:
+        if tail is None:
+            data = f.read()
+        else:
+            pos = f.seek(0, os.SEEK_END)
+            data = b""
+            while pos > 0 and data.count(b"\n") <= tail:
+                step = min(1 << 16, pos)
+                pos -= step
+                f.seek(pos)
+                data = f.read(step) + data
+    lines = data.decode("utf-8", errors="replace").splitlines()
+    if tail is not None:
+        lines = lines[-tail:]
+
+    entries = []
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entry = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(entry, dict):
+            entries.append(entry)
+    return entries
+
+
+def preferred_api_base() -> Optional[str]:
+    """
+    Return the fastest reachable OpenRouter-compatible endpoint from the
+    profile written by 'setup_env.py --doctor', or None if there is none.
+    """
+    path = os.environ.get(
+        "SKILLS_ENDPOINT_PROFILE",
+        os.path.join(os.path.expanduser("~"), ".cache", "my_skills", "endpoint_profile.json")
+    )
+    try:
+        with open(path, "r") as f:
+            ranked = json.load(f)["endpoints"]["openrouter"]
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+    for endpoint in ranked:
+        if endpoint.get("ok"):
+            return endpoint["url"]
+    return None
+
+
+def _cache_status(response) -> Optional[str]:
+    """Best-effort cache status: 'hit', 'miss' or None when unknown."""
+    hidden = getattr(response, "_hidden_params", None) or {}
+    if hidden.get("cache_hit"):
+        return "hit"
+
+    details = getattr(response.usage, "prompt_tokens_details", None)
+    if details is None:
+        return None
+    cached = details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", None)
+    if cached is None:
+        return None
+    return "hit" if cached > 0 else "miss"
+
+
+def estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """Estimate the USD cost of one call, or None for models without pricing."""
+    pricing = MODEL_PRICING.get(model.rsplit("/", 1)[-1])
+    if pricing is None:
+        return None
+    input_price, output_price, request_fee = pricing
+    return (
+        prompt_tokens * input_price / 1_000_000
+        + completion_tokens * output_price / 1_000_000
+        + request_fee / 1000
+    )
+
+
 def search_with_perplexity(
     query: str,
     model: str = "openrouter/perplexity/sonar-pro",
     max_tokens: int = 4000,
     temperature: float = 0.2,
-    verbose: bool = False
+    verbose: bool = False,
+    ledger: bool = True,
+    ledger_path: Optional[str] = None,
+    api_base: Optional[str] = None
 ) -> Dict[str, Any]:
     """
     Perform a search using Perplexity models via LiteLLM and OpenRouter.
@@ -65,6 +259,10 @@ def search_with_perplexity(
         max_tokens: Maximum tokens in response
         temperature: Response temperature (0.0-1.0)
         verbose: Print detailed information
+        ledger: Append the call to the usage ledger
+        ledger_path: Ledger file (default: default_ledger_path())
+        api_base: OpenRouter-compatible API base (default: fastest endpoint
+            in the 'setup_env.py --doctor' profile, else LiteLLM's default)
 
     Returns:
         Dictionary containing the search results and metadata
@@ -92,6 +290,23 @@ def search_with_perplexity(
         print(f"Temperature: {temperature}", file=sys.stderr)
         print("", file=sys.stderr)
 
+    extra = {}
+    if model.startswith("openrouter/"):
+        api_base = api_base or preferred_api_base()
+        if api_base:
+            extra["api_base"] = api_base
+            if verbose:
+                print(f"API base: {api_base}", file=sys.stderr)
+
+    entry = {
+        "timestamp": time.time(),
+        "model": model,
+        "query_chars": len(query),
+        "max_tokens": max_tokens,
+    }
+    entry.update(extra)
+    start = time.perf_counter()
+
     try:
         # Perform the search using LiteLLM
         response = completion(
@@ -101,8 +316,10 @@ def search_with_perplexity(
                 "content": query
             }],
             max_tokens=max_tokens,
-            temperature=temperature
+            temperature=temperature,
+            **extra
         )
+        latency = time.perf_counter() - start
 
         # Extract the response
         result = {
@@ -121,9 +338,27 @@ def search_with_perplexity(
         if hasattr(response.choices[0].message, 'citations'):
             result["citations"] = response.choices[0].message.citations
 
+        result["latency_s"] = round(latency, 3)
+        if ledger:
+            entry.update(result["usage"])
+            entry.update({
+                "latency_s": round(latency, 3),
+                "success": True,
+                "cache": _cache_status(response),
+            })
+            append_to_ledger(entry, ledger_path)
+
         return result
 
     except Exception as e:
+        if ledger:
+            entry.update({
+                "latency_s": round(time.perf_counter() - start, 3),
+                "success": False,
+                "error": str(e),
+                "cache": None,
+            })
+            append_to_ledger(entry, ledger_path)
         return {
             "success": False,
             "error": str(e),
@@ -132,8 +367,545 @@ def search_with_perplexity(
         }
 
 
+def _percentile(values: List[float], pct: float) -> float:
+    """Linear-interpolated percentile of a non-empty list."""
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100
+    lower = int(rank)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (rank - lower)
+
+
+def _parse_time(value: str) -> float:
+    """Parse a relative window (30m, 24h, 7d) or ISO date into a timestamp."""
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+    if value[-1:] in units and value[:-1].replace(".", "", 1).isdigit():
+        return time.time() - float(value[:-1]) * units[value[-1]]
+    return datetime.fromisoformat(value).timestamp()
+
+
+def summarize_ledger(
+    entries: List[Dict[str, Any]],
+    since: Optional[float] = None,
+    until: Optional[float] = None,
+    model: Optional[str] = None
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Aggregate ledger records per model.
+
+    Args:
+        entries: Records from read_ledger()
+        since: Only include calls at or after this timestamp
+        until: Only include calls before this timestamp
+        model: Only include models whose name contains this string
+
+    Returns:
+        Dictionary mapping model name to its aggregated statistics
+    """
+    groups: Dict[str, List[Dict[str, Any]]] = {}
+    for entry in entries:
+        ts = entry.get("timestamp", 0)
+        if since is not None and ts < since:
+            continue
+        if until is not None and ts >= until:
+            continue
+        if model and model not in entry.get("model", ""):
+            continue
+        groups.setdefault(entry.get("model", "unknown"), []).append(entry)
+
+    summary = {}
+    for name, calls in sorted(groups.items()):
+        ok = [c for c in calls if c.get("success")]
+        latencies = [c["latency_s"] for c in ok if "latency_s" in c]
+        prompt_tokens = sum(c.get("prompt_tokens") or 0 for c in ok)
+        completion_tokens = sum(c.get("completion_tokens") or 0 for c in ok)
+        busy_time = sum(latencies)
+
+        spend = None
+        for c in ok:
+            cost = estimate_cost(name, c.get("prompt_tokens") or 0, c.get("completion_tokens") or 0)
+            if cost is not None:
+                spend = (spend or 0.0) + cost
+
+        summary[name] = {
+            "calls": len(calls),
+            "errors": len(calls) - len(ok),
+            "cache_hits": sum(1 for c in calls if c.get("cache") == "hit"),
+            "p50_latency_s": round(_percentile(latencies, 50), 3) if latencies else None,
+            "p95_latency_s": round(_percentile(latencies, 95), 3) if latencies else None,
+            "tokens_per_s": round(completion_tokens / busy_time, 1) if busy_time else None,
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "estimated_spend_usd": round(spend, 4) if spend is not None else None,
+        }
+    return summary
+
+
+def report_main(argv: List[str]) -> int:
+    """Entry point for the 'report' subcommand."""
+    parser = argparse.ArgumentParser(
+        prog="perplexity_search.py report",
+        description="Aggregate latency, throughput and spend from the usage ledger",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # All recorded calls
+  python perplexity_search.py report
+
+  # Last 7 days, Sonar Pro only, as JSON
+  python perplexity_search.py report --since 7d --model sonar-pro --json
+        """
+    )
+    parser.add_argument("--since", help="Start of window: relative (30m, 24h, 7d) or ISO date")
+    parser.add_argument("--until", help="End of window: relative (30m, 24h, 7d) or ISO date")
+    parser.add_argument("--model", help="Only include models whose name contains this string")
+    parser.add_argument("--ledger", help="Ledger file (default: $PERPLEXITY_LEDGER or ~/.cache/perplexity-search/ledger.jsonl)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+
+    args = parser.parse_args(argv)
+
+    try:
+        since = _parse_time(args.since) if args.since else None
+        until = _parse_time(args.until) if args.until else None
+    except ValueError as e:
+        print(f"Error: invalid time window: {e}", file=sys.stderr)
+        return 1
+
+    summary = summarize_ledger(read_ledger(args.ledger), since, until, args.model)
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+        return 0
+
+    if not summary:
+        print("No ledger records in the selected window.")
+        return 0
+
+    def fmt(value, spec=""):
+        return "-" if value is None else format(value, spec)
+
+    header = f"{'MODEL':<40} {'CALLS':>6} {'ERR':>4} {'P50 s':>7} {'P95 s':>7} {'TOK/s':>7} {'TOKENS':>9} {'USD':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, stats in summary.items():
+        tokens = stats["prompt_tokens"] + stats["completion_tokens"]
+        print(
+            f"{name:<40} {stats['calls']:>6} {stats['errors']:>4} "
+            f"{fmt(stats['p50_latency_s'], '.2f'):>7} {fmt(stats['p95_latency_s'], '.2f'):>7} "
+            f"{fmt(stats['tokens_per_s'], '.1f'):>7} {tokens:>9} "
+            f"{fmt(stats['estimated_spend_usd'], '.4f'):>9}"
+        )
+    return 0
+
+
+def _keyword_pattern(keywords) -> "re.Pattern":
+    """Match English keywords on word boundaries and CJK keywords as substrings."""
+    return re.compile("|".join(
+        rf"\b{re.escape(k)}\b" if k.isascii() else re.escape(k) for k in keywords
+    ))
+
+
+_DEEP_RE = _keyword_pattern(DEEP_KEYWORDS)
+_REASONING_RE = _keyword_pattern(REASONING_KEYWORDS)
+_LOOKUP_RE = _keyword_pattern(LOOKUP_PREFIXES)
+_INSTRUCTION_RE = _keyword_pattern(INSTRUCTION_PREFIXES)
+
+# URLs, minus trailing sentence punctuation, so "?", ";" and ":" inside them
+# are not mistaken for question or clause separators.
+_URL_RE = re.compile(r"\w+://\S*[^\s?？!.,;；:：)]")
+
+
+def _mask_urls(text: str) -> Tuple[str, List[str]]:
+    """Replace each URL with a numbered placeholder and return the URLs."""
+    urls: List[str] = []
+
+    def mask(match):
+        urls.append(match.group(0))
+        return f"\x00{len(urls) - 1}\x00"
+
+    return _URL_RE.sub(mask, text), urls
+
+
+def classify_query(query: str) -> Dict[str, Any]:
+    """
+    Classify a query with cheap local heuristics for --model auto.
+
+    Args:
+        query: The search query
+
+    Returns:
+        Dictionary with the preferred model and the signals that chose it
+    """
+    text = query.strip()
+    lowered = text.lower()
+    masked, _ = _mask_urls(text)
+    parts = max(
+        masked.count("?") + masked.count("？"),
+        len(re.findall(r"^\s*(?:\d+[.)、]|[-*•])\s+", masked, re.MULTILINE)),
+        masked.count(";") + masked.count("；") + 1,
+    )
+    deep = sorted(set(_DEEP_RE.findall(lowered)))
+    reasoning = sorted(set(_REASONING_RE.findall(lowered)))
+
+    if (deep and (parts >= 2 or len(text) > 200)) or parts >= 3:
+        model = "sonar-pro-search"
+    elif reasoning:
+        model = "sonar-reasoning-pro"
+    elif deep:
+        model = "sonar-pro"
+    elif len(text) < 80 and parts <= 1 and _LOOKUP_RE.match(lowered):
+        model = "sonar"
+    else:
+        model = "sonar-pro"
+
+    return {
+        "model": model,
+        "length": len(text),
+        "parts": parts,
+        "deep_keywords": deep,
+        "reasoning_keywords": reasoning,
+    }
+
+
+def _expected_performance(
+    model: str,
+    entries: List[Dict[str, Any]],
+    min_samples: int = 5,
+    window: int = 200
+) -> Dict[str, Any]:
+    """Expected p95 latency and completion tokens, from the ledger when possible."""
+    history = [
+        e for e in entries
+        if e.get("success") and "latency_s" in e
+        and e.get("model", "").rsplit("/", 1)[-1] == model
+    ][-window:]
+
+    latency, completion_tokens = ROUTE_PRIORS[model]
+    if len(history) >= min_samples:
+        return {
+            "latency_s": _percentile([e["latency_s"] for e in history], 95),
+            "completion_tokens": _percentile([e.get("completion_tokens") or 0 for e in history], 50),
+            "source": f"ledger ({len(history)} calls)",
+        }
+    return {"latency_s": latency, "completion_tokens": completion_tokens, "source": "prior"}
+
+
+def route_model(
+    query: str,
+    latency_budget: Optional[float] = None,
+    cost_budget: Optional[float] = None,
+    max_tokens: int = 4000,
+    ledger_path: Optional[str] = None,
+    entries: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Pick a Sonar model for a query under optional latency and cost budgets.
+
+    The query is classified locally, then the preferred model is downgraded
+    along ROUTE_DOWNGRADE until its expected p95 latency and cost fit the
+    budgets. Expectations come from the usage ledger when it holds enough
+    history for a model, and from ROUTE_PRIORS otherwise.
+
+    Args:
+        query: The search query
+        latency_budget: Maximum expected latency in seconds
+        cost_budget: Maximum expected cost in USD
+        max_tokens: Maximum tokens in response (caps the cost estimate)
+        ledger_path: Ledger file (default: default_ledger_path())
+        entries: Ledger records already read by the caller (read from ledger_path if None)
+
+    Returns:
+        Dictionary with the chosen model, classification and expectations
+    """
+    classification = classify_query(query)
+    if entries is None:
+        entries = read_ledger(ledger_path, tail=ROUTE_LEDGER_TAIL)
+    prompt_tokens = len(query) // 4 + 1
+
+    candidates = []
+    for model in ROUTE_DOWNGRADE[ROUTE_DOWNGRADE.index(classification["model"]):]:
+        expected = _expected_performance(model, entries)
+        completion_tokens = min(int(expected["completion_tokens"]), max_tokens)
+        candidates.append({
+            "model": model,
+            "expected_latency_s": round(expected["latency_s"], 2),
+            "expected_cost_usd": round(estimate_cost(model, prompt_tokens, completion_tokens), 5),
+            "source": expected["source"],
+        })
+
+    chosen = None
+    for candidate in candidates:
+        if latency_budget is not None and candidate["expected_latency_s"] > latency_budget:
+            continue
+        if cost_budget is not None and candidate["expected_cost_usd"] > cost_budget:
+            continue
+        chosen = candidate
+        break
+
+    within_budget = chosen is not None
+    if chosen is None:
+        chosen = min(candidates, key=lambda c: (c["expected_latency_s"], c["expected_cost_usd"]))
+
+    return dict(chosen, within_budget=within_budget, classification=classification)
+
+
+def resolve_model_name(model: str) -> str:
+    """Prepend the OpenRouter prefix to a short model name if not already present."""
+    if model.startswith("openrouter/"):
+        return model
+    # Check if it's a Perplexity model or other provider
+    if model.startswith("sonar"):
+        return f"openrouter/perplexity/{model}"
+    # For other models (e.g., qwen/, google/, etc.)
+    return f"openrouter/{model}"
+
+
+def split_query(query: str, max_subqueries: int = 5) -> List[str]:
+    """
+    Split a question into sub-queries using its visible structure.
+
+    Numbered or bulleted lines are preferred, then multiple questions, then
+    semicolon-separated clauses. URLs are masked first so their punctuation
+    never splits the question. Text after the last question and answer
+    instructions such as "be concise" are kept on every sub-query. Returns
+    [query] when no structure is found.
+    """
+    text = query.strip()
+    masked, urls = _mask_urls(text)
+    item = re.compile(r"^\s*(?:\d+[.)、]|[-*•])\s+(.*\S)", re.MULTILINE)
+    preamble, context = "", ""
+
+    items = item.findall(masked)
+    if len(items) >= 2:
+        preamble = item.split(masked, maxsplit=1)[0].strip().rstrip(":：")
+        parts = items
+    else:
+        # "Topic: aspect? aspect?" keeps the topic on every sub-query. Only a
+        # colon followed by whitespace (or a full-width colon) before the first
+        # question mark counts, so ratios like 3:2 are left alone.
+        first_question = re.search(r"[?？]", masked)
+        head = masked[:first_question.start()] if first_question else masked
+        separators = list(re.finditer(r":\s|：", head))
+        rest = masked
+        if separators:
+            split_at = separators[-1]
+            if re.search(r"[?？;；]", masked[split_at.end():]):
+                preamble, rest = masked[:split_at.start()].strip(), masked[split_at.end():]
+        questions = list(re.finditer(r"[^?？]+[?？]", rest))
+        if len(questions) >= 2:
+            parts = [q.group(0).strip() for q in questions]
+            trailing = rest[questions[-1].end():].strip()
+            context = f" {trailing}" if trailing else ""
+        else:
+            clauses = [c.strip() for c in re.split(r"[;；]", rest)]
+            parts = [c for c in clauses if not _INSTRUCTION_RE.match(c.lower())]
+            instructions = [c for c in clauses if c and _INSTRUCTION_RE.match(c.lower())]
+            context = "".join(f"; {c}" for c in instructions)
+
+    parts = [p for p in parts if len(p) > 3]
+    if len(parts) < 2:
+        return [text]
+    parts = [(f"{preamble}: {p}" if preamble else p) + context for p in parts]
+    return [re.sub(r"\x00(\d+)\x00", lambda m: urls[int(m.group(1))], p) for p in parts[:max_subqueries]]
+
+
+def plan_subqueries(
+    query: str,
+    max_subqueries: int = 5,
+    ledger: bool = True,
+    ledger_path: Optional[str] = None
+) -> List[str]:
+    """
+    Split a question into sub-queries, asking PLANNER_MODEL when it has no visible structure.
+
+    Returns:
+        List of sub-queries; [query] if the question cannot be split
+    """
+    if max_subqueries <= 1:
+        return [query]
+
+    parts = split_query(query, max_subqueries)
+    if len(parts) > 1:
+        return parts
+
+    prompt = (
+        f"Split the research question below into at most {max_subqueries} independent, "
+        "self-contained web search queries that together cover it. Reply with a JSON "
+        "array of strings only.\n\nQuestion: " + query
+    )
+    plan = search_with_perplexity(
+        prompt, model=PLANNER_MODEL, max_tokens=400, temperature=0.0,
+        ledger=ledger, ledger_path=ledger_path
+    )
+    if not plan["success"]:
+        return [query]
+
+    match = re.search(r"\[.*\]", plan["answer"], re.DOTALL)
+    try:
+        planned = json.loads(match.group(0)) if match else []
+    except json.JSONDecodeError:
+        planned = []
+    planned = [p.strip() for p in planned if isinstance(p, str) and p.strip()]
+    return planned[:max_subqueries] if len(planned) >= 2 else [query]
+
+
+def normalize_citation(citation: Any) -> Any:
+    """Normalize a citation URL so trivially different links deduplicate."""
+    if not isinstance(citation, str):
+        return citation
+    parts = urlsplit(citation.strip())
+    if not parts.scheme or not parts.netloc:
+        return citation.strip()
+
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode([
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith("utm_")
+    ])
+    path = parts.path.rstrip("/") if parts.path not in ("", "/") else ""
+    return urlunsplit((parts.scheme.lower(), host, path, query, ""))
+
+
+def merge_results(query: str, sub_results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge sub-query results into one answer with deduplicated citations.
+
+    Each sub-answer becomes a section; its [n] citation markers are renumbered
+    to point into the merged citation list. Citations are normalized (tracking
+    parameters, fragments and "www." removed) and deduplicated. Sub-queries that
+    failed are listed in a note at the end of the answer.
+    """
+    citations: List[Any] = []
+    index: Dict[str, int] = {}
+    usage = {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    sections = []
+
+    for sub in sub_results:
+        if not sub["success"]:
+            continue
+        mapping = {}
+        for n, citation in enumerate(sub.get("citations") or [], 1):
+            normalized = normalize_citation(citation)
+            key = json.dumps(normalized, sort_keys=True)
+            if key not in index:
+                citations.append(normalized)
+                index[key] = len(citations)
+            mapping[n] = index[key]
+
+        def renumber(match):
+            n = int(match.group(1))
+            return f"[{mapping[n]}]" if n in mapping else match.group(0)
+
+        answer = re.sub(r"\[(\d+)\]", renumber, sub["answer"] or "")
+        sections.append(f"## {sub['query']}\n\n{answer.strip()}")
+        for key in usage:
+            usage[key] += sub["usage"].get(key) or 0
+
+    succeeded = [sub for sub in sub_results if sub["success"]]
+    failed = [sub for sub in sub_results if not sub["success"]]
+    if succeeded and failed:
+        sections.append(
+            f"_Note: {len(failed)} of {len(sub_results)} sub-queries failed and are not covered: "
+            + "; ".join(sub["query"] for sub in failed) + "_"
+        )
+    result = {
+        "success": bool(succeeded),
+        "query": query,
+        "model": ", ".join(sorted({sub["model"] for sub in sub_results})),
+        "answer": "\n\n".join(sections),
+        "usage": usage,
+        "citations": citations,
+        "sub_queries": [
+            {
+                "query": sub["query"],
+                "model": sub["model"],
+                "success": sub["success"],
+                "latency_s": sub.get("latency_s"),
+                "error": sub.get("error"),
+            }
+            for sub in sub_results
+        ],
+    }
+    if not succeeded:
+        result["error"] = "; ".join(sub["error"] for sub in sub_results)
+    return result
+
+
+def deep_search(
+    query: str,
+    model: str = "openrouter/perplexity/sonar-pro",
+    max_tokens: int = 4000,
+    temperature: float = 0.2,
+    max_subqueries: int = 5,
+    latency_budget: Optional[float] = None,
+    cost_budget: Optional[float] = None,
+    verbose: bool = False,
+    ledger: bool = True,
+    ledger_path: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Research a broad question by running its sub-queries concurrently.
+
+    Args:
+        query: The research question
+        model: Model for every sub-query, or 'auto' to route each one
+        max_tokens: Maximum tokens per sub-query response
+        temperature: Response temperature (0.0-1.0)
+        max_subqueries: Upper bound on the number of sub-queries
+        latency_budget: With model='auto': maximum expected latency in seconds
+        cost_budget: With model='auto': maximum expected cost per sub-query in USD
+        verbose: Print detailed information
+        ledger: Append each call to the usage ledger
+        ledger_path: Ledger file (default: default_ledger_path())
+
+    Returns:
+        Merged result in the search_with_perplexity format, plus 'sub_queries'
+    """
+    start = time.perf_counter()
+    sub_queries = plan_subqueries(query, max_subqueries, ledger, ledger_path)
+
+    entries = read_ledger(ledger_path, tail=ROUTE_LEDGER_TAIL) if model == "auto" else None
+    models = []
+    for sub_query in sub_queries:
+        if model == "auto":
+            route = route_model(sub_query, latency_budget, cost_budget, max_tokens, ledger_path, entries)
+            models.append(resolve_model_name(route["model"]))
+        else:
+            models.append(resolve_model_name(model))
+
+    if verbose:
+        print(f"Deep mode: {len(sub_queries)} sub-queries", file=sys.stderr)
+        for sub_query, sub_model in zip(sub_queries, models):
+            print(f"  - [{sub_model}] {sub_query}", file=sys.stderr)
+        print("", file=sys.stderr)
+
+    def run(args):
+        sub_query, sub_model = args
+        sub = search_with_perplexity(
+            sub_query, model=sub_model, max_tokens=max_tokens, temperature=temperature,
+            ledger=ledger, ledger_path=ledger_path
+        )
+        sub.setdefault("query", sub_query)
+        sub.setdefault("model", sub_model)
+        return sub
+
+    with ThreadPoolExecutor(max_workers=len(sub_queries)) as executor:
+        sub_results = list(executor.map(run, zip(sub_queries, models)))
+
+    result = merge_results(query, sub_results)
+    result["latency_s"] = round(time.perf_counter() - start, 3)
+    return result
+
+
 def main():
     """Main entry point for the script."""
+    if len(sys.argv) > 1 and sys.argv[1] == "report":
+        return report_main(sys.argv[2:])
+
     parser = argparse.ArgumentParser(
         description="Perform AI-powered web searches using Perplexity via LiteLLM and OpenRouter",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -154,7 +926,17 @@ Examples:
   # Verbose mode
   python perplexity_search.py "Machine learning trends 2024" --verbose
 
+  # Route automatically to the cheapest model that fits a 10 second budget
+  python perplexity_search.py "What is the boiling point of ethanol?" --model auto --latency-budget 10
+
+  # Split a broad question into concurrent sub-queries and merge the answers
+  python perplexity_search.py "Compare CAR-T and bispecific antibodies: efficacy? safety? cost?" --deep
+
+  # Latency, throughput and spend per model from the usage ledger
+  python perplexity_search.py report --since 7d
+
 Available Models:
+  - auto: Pick sonar, sonar-pro, sonar-reasoning-pro or sonar-pro-search per query
   - sonar-pro (default): General-purpose search with good balance
   - sonar-pro-search: Most advanced agentic search with multi-step reasoning
   - sonar: Standard model for basic searches
@@ -171,7 +953,19 @@ Available Models:
     parser.add_argument(
         "--model",
         default="sonar-pro",
-        help="Model to use (default: sonar-pro). Supports Perplexity models (sonar-pro, sonar-pro-search, etc.) and any OpenRouter model (e.g., qwen/qwen3-vl-235b-a22b-thinking)"
+        help="Model to use (default: sonar-pro). Supports Perplexity models (sonar-pro, sonar-pro-search, etc.) and any OpenRouter model (e.g., qwen/qwen3-vl-235b-a22b-thinking). Use 'auto' to route by query type and budget"
+    )
+
+    parser.add_argument(
+        "--latency-budget",
+        type=float,
+        help="With --model auto: maximum expected latency in seconds"
+    )
+
+    parser.add_argument(
+        "--cost-budget",
+        type=float,
+        help="With --model auto: maximum expected cost per query in USD"
     )
 
     parser.add_argument(
@@ -188,6 +982,25 @@ Available Models:
         help="Response temperature 0.0-1.0 (default: 0.2)"
     )
 
+    parser.add_argument(
+        "--deep",
+        action="store_true",
+        help="Split the question into sub-queries, run them concurrently and merge the answers"
+    )
+
+    def positive_int(value):
+        number = int(value)
+        if number < 1:
+            raise argparse.ArgumentTypeError("must be at least 1")
+        return number
+
+    parser.add_argument(
+        "--max-subqueries",
+        type=positive_int,
+        default=5,
+        help="With --deep: maximum number of sub-queries (default: 5)"
+    )
+
     parser.add_argument(
         "--output",
         help="Save results to JSON file"
@@ -199,6 +1012,12 @@ Available Models:
         help="Print detailed information"
     )
 
+    parser.add_argument(
+        "--no-ledger",
+        action="store_true",
+        help="Do not record this call in the usage ledger"
+    )
+
     parser.add_argument(
         "--check-setup",
         action="store_true",
@@ -224,30 +1043,65 @@ Available Models:
     if not check_dependencies():
         return 1
 
-    # Prepend openrouter/ to model name if not already present
     model = args.model
-    if not model.startswith("openrouter/"):
-        # Check if it's a Perplexity model or other provider
-        if model.startswith("sonar"):
-            model = f"openrouter/perplexity/{model}"
-        else:
-            # For other models (e.g., qwen/, google/, etc.)
-            model = f"openrouter/{model}"
-
-    # Perform the search
-    result = search_with_perplexity(
-        query=args.query,
-        model=model,
-        max_tokens=args.max_tokens,
-        temperature=args.temperature,
-        verbose=args.verbose
-    )
+    route = None
+    if model != "auto" and (args.latency_budget is not None or args.cost_budget is not None):
+        parser.error("--latency-budget and --cost-budget require --model auto")
+
+    if args.deep:
+        # Sub-queries are routed individually when --model auto is used
+        result = deep_search(
+            query=args.query,
+            model=model,
+            max_tokens=args.max_tokens,
+            temperature=args.temperature,
+            max_subqueries=args.max_subqueries,
+            latency_budget=args.latency_budget,
+            cost_budget=args.cost_budget,
+            verbose=args.verbose,
+            ledger=not args.no_ledger
+        )
+    else:
+        # Resolve --model auto to a concrete Sonar model
+        if model == "auto":
+            route = route_model(
+                args.query,
+                latency_budget=args.latency_budget,
+                cost_budget=args.cost_budget,
+                max_tokens=args.max_tokens
+            )
+            model = route["model"]
+            note = "" if route["within_budget"] else " (no model fits the budget; using the fastest)"
+            print(
+                f"Auto-routed to {model}: expected {route['expected_latency_s']:.1f}s, "
+                f"${route['expected_cost_usd']:.4f} [{route['source']}]{note}",
+                file=sys.stderr
+            )
+
+        # Perform the search
+        result = search_with_perplexity(
+            query=args.query,
+            model=resolve_model_name(model),
+            max_tokens=args.max_tokens,
+            temperature=args.temperature,
+            verbose=args.verbose,
+            ledger=not args.no_ledger
+        )
+
+    if route is not None:
+        result["route"] = route
 
     # Handle results
     if not result["success"]:
         print(f"Error: {result['error']}", file=sys.stderr)
         return 1
 
+    failed = [sub for sub in result.get("sub_queries", []) if not sub["success"]]
+    if failed:
+        print(f"Warning: {len(failed)} of {len(result['sub_queries'])} sub-queries failed:", file=sys.stderr)
+        for sub in failed:
+            print(f"  - {sub['query']}: {sub['error']}", file=sys.stderr)
+
     # Print answer
     print("\n" + "="*80)
     print("ANSWER")
@@ -261,6 +1115,10 @@ Available Models:
         print(f"  Prompt tokens: {result['usage']['prompt_tokens']}", file=sys.stderr)
         print(f"  Completion tokens: {result['usage']['completion_tokens']}", file=sys.stderr)
         print(f"  Total tokens: {result['usage']['total_tokens']}", file=sys.stderr)
+        print(f"  Latency: {result['latency_s']:.2f}s", file=sys.stderr)
+        for sub in result.get("sub_queries", []):
+            status = f"{sub['latency_s']:.2f}s" if sub["success"] else f"failed: {sub['error']}"
+            print(f"    - {sub['query']} ({status})", file=sys.stderr)
 
     # Save to file if requested
     if args.output:
@@ -3,9 +3,12 @@
 Setup script for Perplexity Search environment configuration.
 
 This script helps users configure their OpenRouter API key and validates the setup.
+With --doctor it also benchmarks the configured ollama hosts and OpenRouter-compatible
+endpoints and writes a ranked endpoint profile that the tools use as default routing.
 
 Usage:
     python setup_env.py [--api-key YOUR_KEY] [--env-file .env]
+    python setup_env.py --doctor [--ollama-host URL ...] [--openrouter-url URL ...]
 
 Author: Scientific Skills
 License: MIT
@@ -13,8 +16,28 @@ License: MIT
 
 import os
 import sys
+import json
+import time
 import argparse
+import http.client
+import statistics
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
+from typing import Optional, Dict, Any, List
+from urllib.parse import urlsplit
+
+
+DEFAULT_OLLAMA_HOST = "http://localhost:11434"
+DEFAULT_OPENROUTER_URL = "https://openrouter.ai/api/v1"
+DEFAULT_OLLAMA_MODEL = "ministral-3-4k:latest"
+DEFAULT_OPENROUTER_MODEL = "perplexity/sonar"
+
+# Endpoints are ranked by the estimated time to produce a response of this many tokens.
+RANKING_TOKENS = 200
+
+# Probe prompt that reliably streams ~16 tokens, so tokens/s can be measured.
+PROBE_PROMPT = "Count from 1 to 20, separated by spaces."
 
 
 def create_env_file(api_key: str, env_file: str = ".env") -> bool:
@@ -101,6 +124,300 @@ def validate_setup() -> bool:
     return True
 
 
+def default_profile_path() -> str:
+    """Return the endpoint profile path (SKILLS_ENDPOINT_PROFILE or ~/.cache default)."""
+    return os.environ.get(
+        "SKILLS_ENDPOINT_PROFILE",
+        os.path.join(os.path.expanduser("~"), ".cache", "my_skills", "endpoint_profile.json")
+    )
+
+
+def _connect(url: str, timeout: float):
+    """Open an HTTP(S) connection to url and return (connection, base path, connect ms)."""
+    parts = urlsplit(url)
+    conn_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    conn = conn_class(parts.hostname, parts.port, timeout=timeout)
+    start = time.perf_counter()
+    conn.connect()
+    return conn, parts.path.rstrip("/"), (time.perf_counter() - start) * 1000
+
+
+def _stream(conn, path: str, body: Dict[str, Any], headers: Dict[str, str]):
+    """POST a JSON body and yield (elapsed ms since request, line) for each streamed line."""
+    headers = dict(headers, **{"Content-Type": "application/json"})
+    start = time.perf_counter()
+    conn.request("POST", path, body=json.dumps(body), headers=headers)
+    response = conn.getresponse()
+    if response.status != 200:
+        raise RuntimeError(f"HTTP {response.status}: {response.read(200).decode(errors='replace')}")
+    while True:
+        line = response.readline()
+        if not line:
+            break
+        line = line.strip()
+        if line:
+            yield (time.perf_counter() - start) * 1000, line.decode(errors="replace")
+
+
+def _ollama_tag(name: str) -> str:
+    """Ollama treats "name" and "name:latest" as the same model."""
+    return name if ":" in name else f"{name}:latest"
+
+
+def probe_ollama(
+    host: str,
+    model: Optional[str] = None,
+    timeout: float = 30.0,
+    api_key: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Probe an ollama host with one small streaming generation.
+
+    Args:
+        host: Ollama base URL (e.g. http://localhost:11434)
+        model: Model to generate with (default: DEFAULT_OLLAMA_MODEL); the probe
+            fails if the host does not have it installed
+        timeout: Socket timeout in seconds
+        api_key: Bearer token for hosts behind an authenticating proxy
+
+    Returns:
+        Dictionary with connect_ms, ttfb_ms, tokens_per_s and the model used
+    """
+    model = _ollama_tag(model or DEFAULT_OLLAMA_MODEL)
+    headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+    conn, base, connect_ms = _connect(host, timeout)
+    try:
+        conn.request("GET", f"{base}/api/tags", headers=headers)
+        response = conn.getresponse()
+        if response.status != 200:
+            raise RuntimeError(f"HTTP {response.status}: {response.read(200).decode(errors='replace')}")
+        tags = json.loads(response.read() or b"{}")
+        installed = {_ollama_tag(m.get("name") or "") for m in tags.get("models", [])}
+        if _ollama_tag(model) not in installed:
+            raise RuntimeError(f"model {model} is not installed")
+
+        body = {"model": model, "prompt": PROBE_PROMPT, "stream": True, "options": {"num_predict": 16}}
+        ttfb_ms = end_ms = None
+        chunks = 0
+        final = {}
+        for elapsed, line in _stream(conn, f"{base}/api/generate", body, headers):
+            ttfb_ms = elapsed if ttfb_ms is None else ttfb_ms
+            end_ms = elapsed
+            data = json.loads(line)
+            if data.get("error"):
+                raise RuntimeError(data["error"])
+            if data.get("done"):
+                final = data
+            else:
+                chunks += 1
+    finally:
+        conn.close()
+
+    if ttfb_ms is None:
+        raise RuntimeError("empty response")
+    if final.get("eval_count") and final.get("eval_duration"):
+        tokens_per_s = final["eval_count"] / (final["eval_duration"] / 1e9)
+    else:
+        tokens_per_s = chunks / ((end_ms - ttfb_ms) / 1000) if end_ms > ttfb_ms else None
+
+    return {"model": model, "connect_ms": connect_ms, "ttfb_ms": ttfb_ms, "tokens_per_s": tokens_per_s}
+
+
+def probe_openrouter(
+    base_url: str,
+    api_key: str,
+    model: str = DEFAULT_OPENROUTER_MODEL,
+    timeout: float = 30.0
+) -> Dict[str, Any]:
+    """
+    Probe an OpenRouter-compatible endpoint with one small streaming chat completion.
+
+    Args:
+        base_url: API base URL (e.g. https://openrouter.ai/api/v1)
+        api_key: Bearer token
+        model: Model to request
+        timeout: Socket timeout in seconds
+
+    Returns:
+        Dictionary with connect_ms, ttfb_ms, tokens_per_s and the model used
+    """
+    conn, base, connect_ms = _connect(base_url, timeout)
+    body = {
+        "model": model,
+        "messages": [{"role": "user", "content": PROBE_PROMPT}],
+        "max_tokens": 16,
+        "stream": True,
+    }
+    ttfb_ms = first_token_ms = end_ms = None
+    chunks = 0
+    completion_tokens = None
+    try:
+        for elapsed, line in _stream(conn, f"{base}/chat/completions", body,
+                                     {"Authorization": f"Bearer {api_key}"}):
+            ttfb_ms = elapsed if ttfb_ms is None else ttfb_ms
+            if not line.startswith("data:"):
+                continue
+            payload = line[len("data:"):].strip()
+            if payload == "[DONE]":
+                break
+            data = json.loads(payload)
+            if data.get("error"):
+                raise RuntimeError(data["error"].get("message", str(data["error"])))
+            if (data.get("usage") or {}).get("completion_tokens"):
+                completion_tokens = data["usage"]["completion_tokens"]
+            for choice in data.get("choices", []):
+                if (choice.get("delta") or {}).get("content"):
+                    first_token_ms = elapsed if first_token_ms is None else first_token_ms
+                    end_ms = elapsed
+                    chunks += 1
+    finally:
+        conn.close()
+
+    if ttfb_ms is None:
+        raise RuntimeError("empty response")
+    tokens = completion_tokens or chunks
+    tokens_per_s = None
+    if end_ms is not None and end_ms > first_token_ms:
+        tokens_per_s = tokens / ((end_ms - first_token_ms) / 1000)
+
+    return {"model": model, "connect_ms": connect_ms, "ttfb_ms": ttfb_ms, "tokens_per_s": tokens_per_s}
+
+
+def _run_probe(kind: str, url: str, samples: int, probe) -> Dict[str, Any]:
+    """Run a probe several times and summarize it with medians."""
+    entry = {"kind": kind, "url": url, "ok": False}
+    runs = []
+    for _ in range(samples):
+        try:
+            runs.append(probe())
+        except Exception as e:
+            entry["error"] = str(e) or type(e).__name__
+    if not runs:
+        return entry
+
+    entry.pop("error", None)
+    entry["ok"] = True
+    entry["model"] = runs[0]["model"]
+    for metric in ("connect_ms", "ttfb_ms", "tokens_per_s"):
+        values = [r[metric] for r in runs if r[metric] is not None]
+        entry[metric] = round(statistics.median(values), 1) if values else None
+
+    # Estimated seconds to produce RANKING_TOKENS tokens; lower is better.
+    # Without a throughput measurement there is no estimate, and run_doctor
+    # ranks the endpoint after every measured one.
+    if entry["tokens_per_s"]:
+        entry["score_s"] = round(entry["ttfb_ms"] / 1000 + RANKING_TOKENS / entry["tokens_per_s"], 3)
+    else:
+        entry["score_s"] = None
+    return entry
+
+
+def run_doctor(
+    ollama_hosts: List[str],
+    openrouter_urls: List[str],
+    api_key: Optional[str] = None,
+    ollama_model: Optional[str] = None,
+    ollama_api_key: Optional[str] = None,
+    openrouter_model: str = DEFAULT_OPENROUTER_MODEL,
+    samples: int = 1,
+    timeout: float = 30.0
+) -> Dict[str, Any]:
+    """
+    Benchmark all endpoints concurrently and rank them per kind.
+
+    Returns:
+        Endpoint profile: {"generated_at": ..., "endpoints": {"ollama": [...], "openrouter": [...]}}
+    """
+    jobs = [
+        ("ollama", host, lambda h=host: probe_ollama(h, ollama_model, timeout, ollama_api_key))
+        for host in ollama_hosts
+    ]
+    if api_key:
+        jobs += [
+            ("openrouter", url, lambda u=url: probe_openrouter(u, api_key, openrouter_model, timeout))
+            for url in openrouter_urls
+        ]
+
+    with ThreadPoolExecutor(max_workers=max(len(jobs), 1)) as executor:
+        futures = [executor.submit(_run_probe, kind, url, samples, probe) for kind, url, probe in jobs]
+        results = [f.result() for f in futures]
+
+    if not api_key:
+        results += [
+            {"kind": "openrouter", "url": url, "ok": False, "error": "OPENROUTER_API_KEY not set"}
+            for url in openrouter_urls
+        ]
+
+    endpoints: Dict[str, List[Dict[str, Any]]] = {"ollama": [], "openrouter": []}
+    for entry in results:
+        endpoints[entry.pop("kind")].append(entry)
+    for ranked in endpoints.values():
+        ranked.sort(key=lambda e: (
+            not e["ok"],
+            e.get("score_s") is None,
+            e["score_s"] if e.get("score_s") is not None else e.get("ttfb_ms") or 0,
+        ))
+
+    return {"generated_at": datetime.now().isoformat(timespec="seconds"), "endpoints": endpoints}
+
+
+def print_profile(profile: Dict[str, Any]) -> None:
+    """Print a ranked endpoint profile."""
+    def fmt(value, spec):
+        return "-" if value is None else format(value, spec)
+
+    for kind, ranked in profile["endpoints"].items():
+        if not ranked:
+            continue
+        print(f"{kind}:")
+        for rank, e in enumerate(ranked, 1):
+            if e["ok"]:
+                print(
+                    f"  {rank}. ✓ {e['url']} [{e['model']}] connect {fmt(e['connect_ms'], '.0f')} ms, "
+                    f"TTFB {fmt(e['ttfb_ms'], '.0f')} ms, {fmt(e['tokens_per_s'], '.1f')} tok/s"
+                )
+            else:
+                print(f"  {rank}. ✗ {e['url']}: {e['error']}")
+        print()
+
+
+def doctor(args) -> bool:
+    """Benchmark endpoints, print the ranking and write the endpoint profile."""
+    ollama_hosts = args.ollama_host or [
+        os.environ.get("OCR_API_URL") or os.environ.get("OLLAMA_HOST") or DEFAULT_OLLAMA_HOST
+    ]
+    ollama_hosts = [h if "://" in h else f"http://{h}" for h in ollama_hosts]
+    openrouter_urls = args.openrouter_url or [
+        os.environ.get("OPENROUTER_API_BASE", DEFAULT_OPENROUTER_URL)
+    ]
+
+    print("Benchmarking endpoints...")
+    print()
+    profile = run_doctor(
+        ollama_hosts,
+        openrouter_urls,
+        api_key=os.environ.get("OPENROUTER_API_KEY"),
+        ollama_model=args.ollama_model,
+        ollama_api_key=args.ollama_api_key,
+        openrouter_model=args.openrouter_model,
+        samples=args.samples,
+        timeout=args.timeout,
+    )
+    print_profile(profile)
+
+    profile_path = Path(args.profile or default_profile_path())
+    try:
+        profile_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(profile_path, 'w') as f:
+            json.dump(profile, f, indent=2)
+    except OSError as e:
+        print(f"Error writing endpoint profile: {e}", file=sys.stderr)
+        return False
+    print(f"✓ Endpoint profile saved to {profile_path}")
+
+    return any(e["ok"] for ranked in profile["endpoints"].values() for e in ranked)
+
+
 def main():
     """Main entry point for the setup script."""
     parser = argparse.ArgumentParser(
@@ -114,6 +431,10 @@ Examples:
   # Validate existing setup
   python setup_env.py --validate
 
+  # Benchmark endpoints and write the ranked endpoint profile
+  python setup_env.py --doctor
+  python setup_env.py --doctor --ollama-host http://gpu-1:11434 --ollama-host http://gpu-2:11434
+
   # Use custom .env file location
   python setup_env.py --api-key sk-or-v1-xxxxx --env-file /path/to/.env
 
@@ -139,8 +460,71 @@ Get your OpenRouter API key from:
         help="Validate existing setup"
     )
 
+    parser.add_argument(
+        "--doctor",
+        action="store_true",
+        help="Benchmark configured endpoints and write a ranked endpoint profile"
+    )
+
+    parser.add_argument(
+        "--ollama-host",
+        action="append",
+        help="Ollama host to probe; repeatable (default: $OCR_API_URL, $OLLAMA_HOST or http://localhost:11434)"
+    )
+
+    parser.add_argument(
+        "--openrouter-url",
+        action="append",
+        help=f"OpenRouter-compatible API base to probe; repeatable (default: $OPENROUTER_API_BASE or {DEFAULT_OPENROUTER_URL})"
+    )
+
+    parser.add_argument(
+        "--ollama-model",
+        help=f"Model for ollama probes; hosts without it are marked unavailable (default: {DEFAULT_OLLAMA_MODEL})"
+    )
+
+    parser.add_argument(
+        "--ollama-api-key",
+        default=os.environ.get("OCR_API_KEY"),
+        help="Bearer token for ollama hosts (default: $OCR_API_KEY)"
+    )
+
+    parser.add_argument(
+        "--openrouter-model",
+        default=DEFAULT_OPENROUTER_MODEL,
+        help=f"Model for OpenRouter probes (default: {DEFAULT_OPENROUTER_MODEL})"
+    )
+
+    def positive_int(value):
+        number = int(value)
+        if number < 1:
+            raise argparse.ArgumentTypeError("must be at least 1")
+        return number
+
+    parser.add_argument(
+        "--samples",
+        type=positive_int,
+        default=1,
+        help="Probe requests per endpoint; medians are reported (default: 1)"
+    )
+
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=30.0,
+        help="Per-request timeout in seconds (default: 30)"
+    )
+
+    parser.add_argument(
+        "--profile",
+        help="Endpoint profile path (default: $SKILLS_ENDPOINT_PROFILE or ~/.cache/my_skills/endpoint_profile.json)"
+    )
+
     args = parser.parse_args()
 
+    if args.doctor:
+        return 0 if doctor(args) else 1
+
     # If no arguments, show validation
     if not args.api_key and not args.validate:
         args.validate = True
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+本地技能目录 - 离线搜索已安装的技能
+
+扫描技能目录下的 SKILL.md / skill.json，建立持久化的 BM25 关键词索引和
+紧凑的哈希向量索引（NumPy 向量化余弦相似度），无需联网即可完成
+skillnet search 式的 keyword / vector 查询。技能文件变化时按 mtime 与
+内容哈希增量更新。
+
+用法:
+    python skill_catalog.py build [--skills-dir 目录 ...]
+    python skill_catalog.py search "关键词" [--mode vector] [--limit 10]
+    python skill_catalog.py bench
+"""
+
+import json
+import math
+import os
+import re
+import sys
+import time
+import zlib
+import hashlib
+from collections import Counter
+from pathlib import Path
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:
+    print(json.dumps({"error": "请安装 numpy: pip install numpy"}, ensure_ascii=False), file=sys.stderr)
+    sys.exit(1)
+
+
+SKILL_FILES = ("SKILL.md", "skill.md", "skill.json")
+DEFAULT_SKILLS_DIRS = [
+    Path(__file__).resolve().parents[2],
+    Path.home() / ".claude" / "skills",
+]
+DEFAULT_INDEX_DIR = Path.home() / ".cache" / "skillnet_catalog"
+
+EMBED_DIM = 1024
+# 哈希碰撞会让无关查询也得到少量相似度，低于该值的向量结果不返回
+VECTOR_THRESHOLD = 0.1
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_WORD = re.compile(r"[a-z0-9]+|[一-鿿]+")
+
+
+def tokenize(text: str) -> list[str]:
+    """英文/数字按词切分，中文按相邻二字切分（单字保留原字）"""
+    tokens = []
+    for run in _WORD.findall(text.lower()):
+        if run[0] < "一":
+            tokens.append(run)
+        elif len(run) == 1:
+            tokens.append(run)
+        else:
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
+
+
+def embed(tokens: list[str]) -> "np.ndarray":
+    """哈希向量：词与英文词的字符三元组按 crc32 映射到 EMBED_DIM 维，带符号并做 L2 归一化"""
+    features = Counter(tokens)
+    for token in set(tokens):
+        if token.isascii() and len(token) > 3:
+            padded = f"#{token}#"
+            features.update(padded[i:i + 3] for i in range(len(padded) - 2))
+
+    vector = np.zeros(EMBED_DIM, dtype=np.float32)
+    for feature, count in features.items():
+        h = zlib.crc32(feature.encode("utf-8"))
+        vector[h % EMBED_DIM] += (1.0 if h & 0x80000000 else -1.0) * (1.0 + math.log(count))
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+def _frontmatter(text: str) -> tuple[dict, str]:
+    meta = {}
+    if text.startswith("---"):
+        end = text.find("\n---", 3)
+        if end != -1:
+            for line in text[3:end].splitlines():
+                key, sep, value = line.partition(":")
+                if sep and key.strip() and not key.startswith(" "):
+                    meta[key.strip()] = value.strip().strip("\"'")
+            return meta, text[end + 4:]
+    return meta, text
+
+
+def parse_skill(skill_dir: Path) -> dict:
+    """读取技能目录中的 SKILL.md / skill.md / skill.json，返回名称、描述与检索文本"""
+    name, description, triggers, body = skill_dir.name, "", [], ""
+    for filename in SKILL_FILES:
+        path = skill_dir / filename
+        if not path.is_file():
+            continue
+        text = path.read_text(encoding="utf-8", errors="replace")
+        if filename.endswith(".json"):
+            try:
+                data = json.loads(text)
+            except ValueError:
+                continue
+            if not isinstance(data, dict):
+                continue
+            # 只接受字符串字段，null、数字、列表等写法一律忽略
+            for key in ("label", "name", "id"):
+                if isinstance(data.get(key), str) and data[key]:
+                    name = data[key]
+                    break
+            if not description and isinstance(data.get("description"), str):
+                description = data["description"]
+            triggers = data.get("triggers") or []
+            if isinstance(triggers, str):
+                triggers = [triggers]
+            elif isinstance(triggers, list):
+                triggers = [t for t in triggers if isinstance(t, str)]
+            else:
+                triggers = []
+        else:
+            meta, body = _frontmatter(text)
+            name = meta.get("name") or name
+            description = meta.get("description") or description
+    summary = "\n".join([name, description, " ".join(triggers)])
+    return {
+        "name": name,
+        "description": description,
+        # 向量只用名称、描述与触发词，正文噪声大且会加剧哈希碰撞
+        "summary": summary,
+        # BM25 用全文，名称、描述、触发词重复一次加权
+        "text": "\n".join([summary, name, description, body]),
+    }
+
+
+class SkillCatalog:
+    def __init__(self, skills_dirs: Optional[list] = None, index_dir: Optional[str] = None):
+        env_dirs = os.environ.get("SKILLNET_SKILLS_DIRS")
+        if skills_dirs:
+            self.skills_dirs = [Path(d) for d in skills_dirs]
+        elif env_dirs:
+            self.skills_dirs = [Path(d) for d in env_dirs.split(os.pathsep) if d]
+        else:
+            self.skills_dirs = DEFAULT_SKILLS_DIRS
+        self.index_dir = Path(index_dir or os.environ.get("SKILLNET_CATALOG_DIR", DEFAULT_INDEX_DIR))
+        self.docs: list[dict] = []
+        self.vectors = np.zeros((0, EMBED_DIM), dtype=np.float32)
+        self._postings: dict[str, list[tuple[int, int]]] = {}
+        self._avgdl = 0.0
+        self._load()
+
+    # ---------- 持久化 ----------
+
+    def _load(self):
+        catalog = self.index_dir / "catalog.json"
+        vectors = self.index_dir / "vectors.npy"
+        if not (catalog.is_file() and vectors.is_file()):
+            return
+        try:
+            data = json.loads(catalog.read_text(encoding="utf-8"))
+            matrix = np.load(vectors)
+        except (OSError, ValueError):
+            return
+        if data.get("dim") != EMBED_DIM or len(data.get("docs", [])) != len(matrix):
+            return
+        self.docs, self.vectors = data["docs"], matrix
+        self._build_postings()
+
+    def _save(self):
+        self.index_dir.mkdir(parents=True, exist_ok=True)
+        catalog = self.index_dir / "catalog.json"
+        tmp = catalog.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"dim": EMBED_DIM, "docs": self.docs}, ensure_ascii=False), encoding="utf-8")
+        with open(self.index_dir / "vectors.tmp", "wb") as f:
+            np.save(f, self.vectors)
+        os.replace(self.index_dir / "vectors.tmp", self.index_dir / "vectors.npy")
+        os.replace(tmp, catalog)
+
+    def _build_postings(self):
+        """由各技能的词频表生成倒排表，并预先算好每个 (词, 技能) 的 BM25 权重"""
+        n = len(self.docs)
+        self._avgdl = sum(d["length"] for d in self.docs) / n if n else 0.0
+        grouped: dict[str, tuple[list, list]] = {}
+        for i, doc in enumerate(self.docs):
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * doc["length"] / self._avgdl) if self._avgdl else BM25_K1
+            for term, tf in doc["tf"].items():
+                ids, weights = grouped.setdefault(term, ([], []))
+                ids.append(i)
+                weights.append(tf * (BM25_K1 + 1) / (tf + norm))
+
+        postings = {}
+        for term, (ids, weights) in grouped.items():
+            idf = math.log(1 + (n - len(ids) + 0.5) / (len(ids) + 0.5))
+            postings[term] = (np.array(ids, dtype=np.int32), np.array(weights, dtype=np.float32) * idf)
+        self._postings = postings
+
+    # ---------- 增量更新 ----------
+
+    def _scan(self) -> dict[str, Path]:
+        found = {}
+        for root in self.skills_dirs:
+            if not root.is_dir():
+                continue
+            for skill_dir in [root, *sorted(p for p in root.iterdir() if p.is_dir())]:
+                if any((skill_dir / f).is_file() for f in SKILL_FILES):
+                    found[str(skill_dir.resolve())] = skill_dir
+        return found
+
+    @staticmethod
+    def _stamps(skill_dir: Path) -> list:
+        stamps = []
+        for filename in SKILL_FILES:
+            path = skill_dir / filename
+            if path.is_file():
+                st = path.stat()
+                stamps.append([filename, st.st_mtime, st.st_size])
+        return stamps
+
+    def update(self) -> dict:
+        """扫描技能目录：mtime 未变的技能跳过，内容哈希未变只刷新 mtime，其余重新建索引"""
+        start = time.time()
+        stats = {"added": 0, "updated": 0, "unchanged": 0, "removed": 0}
+        existing = {doc["path"]: (doc, self.vectors[i]) for i, doc in enumerate(self.docs)}
+        on_disk = self._scan()
+        dirty = not (self.index_dir / "catalog.json").is_file()
+
+        docs, vectors = [], []
+        for key, skill_dir in on_disk.items():
+            stamps = self._stamps(skill_dir)
+            previous = existing.get(key)
+            if previous and previous[0]["stamps"] == stamps:
+                docs.append(previous[0])
+                vectors.append(previous[1])
+                stats["unchanged"] += 1
+                continue
+
+            digest = hashlib.sha256(b"".join(
+                (skill_dir / f).read_bytes() for f in SKILL_FILES if (skill_dir / f).is_file()
+            )).hexdigest()
+            dirty = True
+            if previous and previous[0]["hash"] == digest:
+                previous[0]["stamps"] = stamps
+                docs.append(previous[0])
+                vectors.append(previous[1])
+                stats["unchanged"] += 1
+                continue
+
+            skill = parse_skill(skill_dir)
+            tokens = tokenize(skill["text"])
+            docs.append({
+                "path": key,
+                "name": skill["name"],
+                "description": skill["description"],
+                "stamps": stamps,
+                "hash": digest,
+                "length": len(tokens),
+                "tf": dict(Counter(tokens)),
+            })
+            vectors.append(embed(tokenize(skill["summary"])))
+            stats["updated" if previous else "added"] += 1
+
+        stats["removed"] = len(set(existing) - set(on_disk))
+        if dirty or stats["removed"]:
+            self.docs = docs
+            self.vectors = np.vstack(vectors).astype(np.float32) if vectors else np.zeros((0, EMBED_DIM), np.float32)
+            self._build_postings()
+            self._save()
+
+        stats["skills"] = len(self.docs)
+        stats["elapsed"] = round(time.time() - start, 3)
+        return stats
+
+    # ---------- 查询 ----------
+
+    def search_keyword(self, query: str, limit: int = 20) -> list[dict]:
+        """BM25 关键词检索（按词累加预先算好的权重向量）"""
+        scores = np.zeros(len(self.docs), dtype=np.float32)
+        for term in set(tokenize(query)):
+            if term in self._postings:
+                ids, weights = self._postings[term]
+                scores[ids] += weights
+        return self._top(scores, limit, threshold=1e-9)
+
+    def search_vector(self, query: str, limit: int = 20, threshold: float = VECTOR_THRESHOLD) -> list[dict]:
+        """哈希向量余弦相似度检索（向量已归一化，一次矩阵乘法完成打分）"""
+        if not self.docs:
+            return []
+        return self._top(self.vectors @ embed(tokenize(query)), limit, threshold)
+
+    def _top(self, scores: "np.ndarray", limit: int, threshold: float) -> list[dict]:
+        k = min(limit, len(scores))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [self._result(int(i), float(scores[i])) for i in top if scores[i] >= threshold]
+
+    def search(self, query: str, mode: str = "keyword", limit: int = 20, threshold: float = VECTOR_THRESHOLD) -> list[dict]:
+        if mode == "vector":
+            return self.search_vector(query, limit, threshold)
+        return self.search_keyword(query, limit)
+
+    def _result(self, i: int, score: float) -> dict:
+        doc = self.docs[i]
+        return {"name": doc["name"], "score": round(score, 4), "description": doc["description"], "path": doc["path"]}
+
+
+def benchmark(catalog: SkillCatalog, limit: int = 5, queries_file: Optional[str] = None) -> dict:
+    """
+    相关性与延迟基准。
+
+    默认以每个技能的名称和描述首句作为查询、该技能本身作为期望结果；
+    也可以用 JSONL 文件提供 {"query": ..., "expected": 技能名} 作为评测集。
+    """
+    cases = []
+    if queries_file:
+        with open(queries_file, "r", encoding="utf-8") as f:
+            cases = [json.loads(line) for line in f if line.strip()]
+    else:
+        for doc in catalog.docs:
+            first_sentence = re.split(r"[。.!！?？\n]", doc["description"] or "")[0].strip()
+            for query in {doc["name"], first_sentence} - {""}:
+                cases.append({"query": query, "expected": doc["name"]})
+
+    report = {"skills": len(catalog.docs), "queries": len(cases)}
+    for mode in ("keyword", "vector"):
+        latencies, hits_at_1, hits_at_k, reciprocal_ranks = [], 0, 0, []
+        for case in cases:
+            start = time.perf_counter()
+            results = catalog.search(case["query"], mode, limit)
+            latencies.append((time.perf_counter() - start) * 1000)
+            names = [r["name"] for r in results]
+            rank = names.index(case["expected"]) + 1 if case["expected"] in names else None
+            hits_at_1 += rank == 1
+            hits_at_k += rank is not None
+            reciprocal_ranks.append(1 / rank if rank else 0.0)
+        latencies.sort()
+        count = max(len(cases), 1)
+        report[mode] = {
+            "recall@1": round(hits_at_1 / count, 3),
+            f"recall@{limit}": round(hits_at_k / count, 3),
+            "mrr": round(sum(reciprocal_ranks) / count, 3),
+            "p50_ms": round(latencies[len(latencies) // 2], 3) if latencies else None,
+            "p95_ms": round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)], 3) if latencies else None,
+        }
+    return report
+
+
+def main(argv: Optional[list] = None):
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog="skillnet_quick_ref.py catalog",
+        description="本地技能目录 - 离线 keyword / vector 搜索已安装的技能",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+示例:
+  # 建立/增量更新索引
+  %(prog)s build --skills-dir ~/.claude/skills
+
+  # 关键词搜索 (BM25)
+  %(prog)s search "网页爬虫"
+
+  # 向量搜索 (哈希向量 + 余弦相似度)
+  %(prog)s search "帮我抓取网页数据" --mode vector --limit 5
+
+  # 相关性与延迟基准
+  %(prog)s bench
+        """
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="建立/增量更新索引")
+    search = sub.add_parser("search", help="离线搜索技能")
+    search.add_argument("query", help="搜索关键词或自然语言描述")
+    search.add_argument("--mode", choices=["keyword", "vector"], default="keyword", help="keyword (默认) 或 vector")
+    search.add_argument("--limit", type=int, default=20, help="返回数量 (默认 20)")
+    search.add_argument("--threshold", type=float, default=VECTOR_THRESHOLD,
+                        help=f"相似度阈值 0-1 (仅 vector，默认 {VECTOR_THRESHOLD})")
+    search.add_argument("--no-refresh", action="store_true", help="搜索前不检查技能文件变化")
+    search.add_argument("--json", action="store_true", help="输出 JSON 格式")
+    bench = sub.add_parser("bench", help="相关性 (recall/MRR) 与延迟基准")
+    bench.add_argument("--limit", type=int, default=5, help="recall@k 的 k (默认 5)")
+    bench.add_argument("--queries", help="评测集 JSONL：每行 {\"query\": ..., \"expected\": 技能名}")
+
+    for p in (build, search, bench):
+        p.add_argument("--skills-dir", action="append",
+                       help="技能目录，可重复 (默认：$SKILLNET_SKILLS_DIRS，或本仓库与 ~/.claude/skills)")
+        p.add_argument("--index-dir", help=f"索引目录 (默认：$SKILLNET_CATALOG_DIR 或 {DEFAULT_INDEX_DIR})")
+
+    args = parser.parse_args(argv)
+    catalog = SkillCatalog(args.skills_dir, args.index_dir)
+
+    if args.command == "build":
+        print(json.dumps(catalog.update(), ensure_ascii=False))
+        return 0
+
+    if args.command == "bench":
+        catalog.update()
+        print(json.dumps(benchmark(catalog, args.limit, args.queries), ensure_ascii=False, indent=2))
+        return 0
+
+    if not args.no_refresh or not catalog.docs:
+        catalog.update()
+    start = time.perf_counter()
+    results = catalog.search(args.query, args.mode, args.limit, args.threshold)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    if args.json:
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+        return 0
+
+    print(f"Search Results: {args.query} ({len(results)} items, {args.mode}, {elapsed_ms:.2f} ms)")
+    print("-" * 80)
+    for r in results:
+        print(f"{r['score']:>8.3f}  {r['name']}")
+        if r["description"]:
+            desc = r["description"]
+            print(f"          {desc[:100]}{'...' if len(desc) > 100 else ''}")
+        print(f"          {r['path']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
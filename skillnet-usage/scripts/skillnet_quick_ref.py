@@ -4,8 +4,11 @@ SkillNet 快速参考脚本
 
 用法:
     python skillnet_quick_ref.py
+    python skillnet_quick_ref.py catalog search "关键词" [--mode vector]
 """
 
+import sys
+
 COMMANDS = {
     "search": {
         "desc": "搜索技能",
@@ -82,6 +85,23 @@ COMMANDS = {
             "--model": "LLM 模型 (默认 gpt-4o)",
         },
         "relations": ["similar_to", "belong_to", "compose_with", "depend_on"]
+    },
+    "catalog": {
+        "desc": "离线搜索本地已安装技能",
+        "usage": 'python skillnet_quick_ref.py catalog <build|search|bench> [选项]',
+        "examples": [
+            "python skillnet_quick_ref.py catalog build --skills-dir ~/.claude/skills",
+            'python skillnet_quick_ref.py catalog search "网页爬虫"',
+            'python skillnet_quick_ref.py catalog search "帮我抓取数据" --mode vector',
+            "python skillnet_quick_ref.py catalog bench",
+        ],
+        "key_params": {
+            "--mode": "keyword (默认，BM25) 或 vector (哈希向量余弦相似度)",
+            "--limit": "返回数量 (默认 20)",
+            "--threshold": "相似度阈值 0-1(仅 vector)",
+            "--skills-dir": "技能目录，可重复",
+            "--index-dir": "索引目录 (默认 ~/.cache/skillnet_catalog)",
+        }
     }
 }
 
@@ -112,4 +132,7 @@ def print_quick_ref():
         print()
 
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "catalog":
+        from skill_catalog import main
+        sys.exit(main(sys.argv[2:]))
     print_quick_ref()
\ No newline at end of file